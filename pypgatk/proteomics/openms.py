@@ -82,11 +82,66 @@ class OpenmsDataService(ParameterConfiguration):
     def _filter_by_group(accessions, peptide_classes):
         return is_peptide_group(peptide_classes, accessions)
 
+    def _get_peptide_class_masks(self, accessions):
+        """
+    Compute the membership of every PSM to each peptide class in the peptide groups. As in is_peptide_group, a PSM
+    belongs to a class if the number of class prefixes found in its accessions is the number of accessions. Each
+    distinct accession is only matched once against the prefixes.
+    :param accessions: protein accessions of each PSM
+    :return: boolean matrix with one row per PSM and one column per peptide class
+    """
+        classes = tuple(tuple(members) for members in self._peptide_groups_prefix.values())
+        lengths = np.fromiter((len(a) for a in accessions), dtype=np.int64, count=len(accessions))
+
+        # Give every distinct accession an id and count the prefixes of each class in it
+        accession_ids = {}
+        psm_accession_ids = np.fromiter((accession_ids.setdefault(accession, len(accession_ids))
+                                         for psm_accessions in accessions for accession in psm_accessions),
+                                        dtype=np.int64, count=lengths.sum())
+        accession_counts = np.zeros((len(accession_ids), len(classes)), dtype=np.int64)
+        for i, members in enumerate(classes):
+            accession_counts[:, i] = np.fromiter((sum(member in accession for member in members)
+                                                  for accession in accession_ids), dtype=np.int64,
+                                                 count=len(accession_ids))
+
+        # Sum the counts of the accessions of each PSM
+        cum_counts = np.zeros((len(psm_accession_ids) + 1, accession_counts.shape[1]), dtype=np.int64)
+        np.cumsum(accession_counts[psm_accession_ids], axis=0, out=cum_counts[1:])
+        ends = np.cumsum(lengths)
+        psm_counts = cum_counts[ends] - cum_counts[ends - lengths]
+        return psm_counts == lengths[:, None]
+
     @staticmethod
     def _series_get_qvalue(arr_fdr: list):
         s = pd.Series(arr_fdr)
         return s[::-1].cummin()[::-1]
 
+    @staticmethod
+    def _get_fdr_qvalue(target: np.ndarray):
+        """
+    Compute the FDR and q-value of PSMs sorted from the best to the worst score
+    :param target: target (1) or decoy (0) label of each PSM
+    :return: FDR and q-value arrays
+    """
+        with np.errstate(divide='ignore'):
+            fdr = np.arange(1, len(target) + 1, dtype=np.float64) / np.cumsum(target) - 1.0
+        return fdr, np.minimum.accumulate(fdr[::-1])[::-1]
+
+    @staticmethod
+    def _get_class_qvalues(scores: np.ndarray, targets: np.ndarray, class_index: np.ndarray, ascending: bool):
+        """
+    Compute the class-specific q-values of the PSMs of one peptide class
+    :param scores: score of each PSM
+    :param targets: target (1) or decoy (0) label of each PSM
+    :param class_index: positions of the PSMs of the peptide class
+    :param ascending: True if lower scores are better
+    :return: positions of the class PSMs sorted by score and their q-values
+    """
+        class_scores = scores[class_index]
+        class_index = class_index[np.argsort(class_scores if ascending else -class_scores, kind='stable')]
+        _, qvalue = OpenmsDataService._get_fdr_qvalue(targets[class_index])
+        return class_index, qvalue
+
     @staticmethod
     def _get_msrescore_modification(modification):
         specificity_index = modification.getTermSpecificity()
@@ -118,23 +173,19 @@ class OpenmsDataService(ParameterConfiguration):
             raise ValueError("The Global FDR error do not support multiple orders for scores")
         ascending = (orders[0] == False)
 
-        ls = []
-        for c in self._peptide_groups_prefix:
-            # split the dataframe and save the subset
-            currClass = df_psms[
-                df_psms['accessions'].apply(lambda x: self._filter_by_group(x, self._peptide_groups_prefix[c]))]
-            ls.append(currClass)
-
-            # calculate class-specific q-value
-            currClass.sort_values("score", ascending=ascending, inplace=True)
-            FDR = (range(1, len(currClass["target"]) + 1) / currClass["target"].cumsum()) - 1
-            currClass['class-specific-q-value'] = FDR[::-1].cummin()[::-1]
-        df = pd.concat(ls)
-
-        # df_psms['class-specific-q-value'] = df['class-specific-q-value']
-        df_psms = df_psms.merge(df['class-specific-q-value'], left_index=True, right_index=True, how='left')
-        df_psms.loc[df_psms['class-specific-q-value'].isnull(), 'class-specific-q-value'] = df_psms['q-value']
-        df_psms.sort_values("score", ascending=ascending, inplace=True)
+        class_masks = self._get_peptide_class_masks(df_psms['accessions'].to_numpy())
+        scores = df_psms['score'].to_numpy()
+        targets = df_psms['target'].to_numpy()
+
+        class_qvalue = np.full(len(df_psms), np.nan)
+        for i in range(class_masks.shape[1]):
+            # calculate class-specific q-value on the class subset sorted by score
+            class_index, qvalue = self._get_class_qvalues(scores, targets, np.flatnonzero(class_masks[:, i]),
+                                                          ascending)
+            class_qvalue[class_index] = qvalue
+
+        df_psms['class-specific-q-value'] = np.where(np.isnan(class_qvalue), df_psms['q-value'].to_numpy(),
+                                                     class_qvalue)
 
         return df_psms
 
@@ -208,13 +259,40 @@ class OpenmsDataService(ParameterConfiguration):
         ascending = (orders[0] == False)
 
         df_psms.sort_values("score", ascending=ascending, inplace=True)
-        df_psms['FDR'] = (range(1, len(df_psms) + 1) / df_psms['target'].cumsum()) - 1
-        df_psms['q-value'] = df_psms['FDR'][::-1].cummin()[::-1]
-
-        df_psms.sort_values("score", ascending=ascending, inplace=True)
+        df_psms['FDR'], df_psms['q-value'] = OpenmsDataService._get_fdr_qvalue(df_psms['target'].to_numpy())
 
         return df_psms
 
+    @staticmethod
+    def _get_bayesian_qvalues(scores: np.ndarray, last_same_score: np.ndarray, class_masks: np.ndarray,
+                              class_coefs: np.ndarray, target_cum: np.ndarray, decoy_cum: np.ndarray,
+                              class_target_cum: np.ndarray, qvalue: np.ndarray):
+        """
+    Compute the bayesian class-specific q-values, only the PSMs of the peptide classes with a model are updated
+    :param scores: -log10 score of each PSM sorted from the best to the worst
+    :param last_same_score: position of the last PSM with the same score of each PSM
+    :param class_masks: boolean matrix of PSMs x peptide classes
+    :param class_coefs: intercept and slope of the model of each peptide class, NaN if the class has no model
+    :param target_cum: cumulative number of targets
+    :param decoy_cum: cumulative number of decoys
+    :param class_target_cum: cumulative number of targets of each peptide class (PSMs x classes)
+    :param qvalue: global q-value of each PSM
+    :return: class-specific q-value of each PSM
+    """
+        rows, classes = np.nonzero(class_masks & ~np.isnan(class_coefs[:, 0]))
+        counts_index = last_same_score[rows]
+        target_count = target_cum[counts_index]
+        novel_target_count = class_target_cum[counts_index, classes]
+        gamma = class_coefs[classes, 0] + class_coefs[classes, 1] * scores[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            novel_fdr = decoy_cum[counts_index] / target_count * gamma * (target_count / novel_target_count)
+        # If the model raise an error because novel_target_count = 0
+        novel_fdr[novel_target_count == 0] = 10000
+
+        class_qvalue = qvalue.copy()
+        class_qvalue[rows] = novel_fdr
+        return class_qvalue
+
     def _compute_bayesian_class_fdr(self, df_psms: DataFrame):
         """
     Compute the bayesian class FDR from manuscript (https://pubmed.ncbi.nlm.nih.gov/24200586/). From previous discussions
@@ -226,19 +304,6 @@ class OpenmsDataService(ParameterConfiguration):
     :return:  filtered peptides
     """
 
-        score_dic = {}
-        decoy_dic = {}
-
-        # A dictionary of peptide classes with number of decoys and targets per class
-        novel_target_decoy_count = {}
-        for peptide_class in self._peptide_groups_prefix:
-            novel_target_decoy_count[peptide_class] = (0, 0)
-            decoy_dic[peptide_class] = {}
-            score_dic[peptide_class] = {}
-
-        global_decoy_count = 0
-        global_target_count = 0
-
         # Get the order of the score
         orders = df_psms["is_higher_score_better"].unique()
         if len(orders) != 1:
@@ -247,92 +312,44 @@ class OpenmsDataService(ParameterConfiguration):
 
         df_psms.sort_values("score", ascending=ascending, inplace=True)
 
-        for psm_index, score_raw, accessions in zip(df_psms.index, df_psms["score"], df_psms["accessions"]):
-            score = -np.log10(float(score_raw))
-            if any(self._decoy_prefix in s for s in accessions):
-                global_decoy_count += 1
-                for peptide_group in self._peptide_groups_prefix:
-                    if is_peptide_group(self._peptide_groups_prefix[peptide_group], accessions):
-                        (target, decoy) = novel_target_decoy_count[peptide_group]
-                        decoy += 1
-                        novel_target_decoy_count[peptide_group] = (target, decoy)
-                        decoy_dic[peptide_group][score] = [decoy, global_decoy_count]
-            else:
-                global_target_count += 1
-                for peptide_group in self._peptide_groups_prefix:
-                    if is_peptide_group(self._peptide_groups_prefix[peptide_group], accessions):
-                        (target, decoy) = novel_target_decoy_count[peptide_group]
-                        target += 1
-                        novel_target_decoy_count[peptide_group] = (target, decoy)
-
-            for peptide_group in self._peptide_groups_prefix:
-                (target, decoy) = novel_target_decoy_count[peptide_group]
-                score_dic[peptide_group][score] = [global_target_count, global_decoy_count, target, decoy]
-
-        peptide_dict_models = {}
-        for peptide_class in score_dic:
-            x = []
-            y = []
-            x_filter = []
-            y_filter = []
-            for score in decoy_dic[peptide_class]:
-                x.append(score)
-                frac = float(decoy_dic[peptide_class][score][0] / decoy_dic[peptide_class][score][1])
-                y.append(frac)
-                # Todo: In the original algorithm the authors used a filter for the score between 6-10
-                #  https://github.com/yafeng/proteogenomics_python/blob/4b1638aa75903225e9ae45892af4cb9f078d7421/BayesClassSpecificFDR.py#L88
-                # if 6 < score < 10:
-                #   x_filter.append(score)
-                #   y_filter.append(frac)
-                x_filter.append(score)
-                y_filter.append(frac)
-            if len(x_filter) > 0 and len(y_filter) > 0:
-                coefs = poly.polyfit(np.array(x_filter), np.array(y_filter), 1)
-                fit = poly.polyval(x, coefs)
-                peptide_dict_models[peptide_class] = (coefs, fit)
-
-        global_decoy_count = 0
-        global_target_count = 0
-
-        psm_index_qvalue = []
-        class_qvalue = []
-        for psm_index, score_raw, accessions, qvalue in zip(df_psms.index, df_psms["score"], df_psms["accessions"],
-                                                            df_psms["q-value"]):
-            score = -np.log10(float(score_raw))
-            canonical_peptide = True
-            for peptide_class in peptide_dict_models:
-                if is_peptide_group(self._peptide_groups_prefix[peptide_class], accessions):
-                    canonical_peptide = False
-                    counts = score_dic[peptide_class][score]
-                    target_count = float(counts[0])
-                    decoy_count = float(counts[1])
-                    FDR = decoy_count / target_count
-                    novel_targetcount = float(counts[2])
-                    gamma = poly.polyval(score, peptide_dict_models[peptide_class][0])
-                    try:
-                        novelFDR = FDR * gamma * (target_count / novel_targetcount)
-                    except ZeroDivisionError:
-                        novelFDR = 10000
-                        # If the model raise an error because novel_targetcount = 0
-                    psm_index_qvalue.append(psm_index)
-                    class_qvalue.append(novelFDR)
-
-            if any(self._decoy_prefix in s for s in accessions):
-                global_decoy_count += 1
-            else:
-                global_target_count += 1
-
-            if canonical_peptide:
-                psm_index_qvalue.append(psm_index)
-                class_qvalue.append(qvalue)
-
-        d = {self._psm_df_index: psm_index_qvalue, 'class-specific-q-value': class_qvalue}
-        df = pd.DataFrame(d)
-        df.set_index(self._psm_df_index)
-
-        df_psms = df_psms.merge(df['class-specific-q-value'], left_index=True, right_index=True, how='left')
-        df_psms.loc[df_psms['class-specific-q-value'].isnull(), 'class-specific-q-value'] = df_psms['q-value']
-        df_psms.sort_values("score", ascending=ascending, inplace=True)
+        # -log10 of all the scores in a single ufunc call, scores of 0 are mapped to inf without warnings
+        with np.errstate(divide='ignore'):
+            scores = -np.log10(df_psms["score"].to_numpy(dtype=np.float64))
+        decoy_mask = df_psms["is_decoy"].to_numpy(dtype=bool)
+
+        # PSMs with the same score share the counts of the last PSM with that score
+        new_score = np.empty(len(scores), dtype=bool)
+        new_score[:1] = True
+        new_score[1:] = scores[1:] != scores[:-1]
+        last_same_score = np.append(np.flatnonzero(new_score)[1:] - 1, len(scores) - 1)[np.cumsum(new_score) - 1]
+
+        decoy_cum = np.cumsum(decoy_mask)
+        target_cum = np.cumsum(~decoy_mask)
+
+        # Cumulative number of targets and decoys of each peptide class (PSMs x classes)
+        class_masks = self._get_peptide_class_masks(df_psms["accessions"].to_numpy())
+        class_target_cum = np.cumsum(class_masks & ~decoy_mask[:, None], axis=0, dtype=np.int32)
+        class_decoy_cum = np.cumsum(class_masks & decoy_mask[:, None], axis=0, dtype=np.int32)
+
+        # Linear model of the fraction of class decoys in all decoys, fitted at the last class decoy for each score
+        class_coefs = np.full((class_masks.shape[1], 2), np.nan)
+        for i in range(class_masks.shape[1]):
+            decoy_index = np.flatnonzero(class_masks[:, i] & decoy_mask)
+            if len(decoy_index) == 0:
+                continue
+            decoy_scores = scores[decoy_index]
+            decoy_index = decoy_index[np.append(decoy_scores[1:] != decoy_scores[:-1], True)]
+            # Todo: In the original algorithm the authors used a filter for the score between 6-10
+            #  https://github.com/yafeng/proteogenomics_python/blob/4b1638aa75903225e9ae45892af4cb9f078d7421/BayesClassSpecificFDR.py#L88
+            x = scores[decoy_index]
+            y = class_decoy_cum[decoy_index, i] / decoy_cum[decoy_index]
+            class_coefs[i] = poly.polyfit(x, y, 1)
+
+        class_qvalue = self._get_bayesian_qvalues(scores, last_same_score, class_masks, class_coefs,
+                                                  target_cum, decoy_cum, class_target_cum,
+                                                  df_psms["q-value"].to_numpy(dtype=np.float64))
+
+        df_psms['class-specific-q-value'] = class_qvalue
 
         return df_psms
 
@@ -356,12 +373,14 @@ class OpenmsDataService(ParameterConfiguration):
         df_psms = self._compute_global_fdr(df_psms)
 
         if self._peptide_class_fdr_disable:
-            df_psms = df_psms[df_psms['q-value'] < self._psm_pep_fdr_cutoff]
+            mask = df_psms['q-value'].to_numpy() < float(self._psm_pep_fdr_cutoff)
+            df_psms = df_psms.iloc[mask]
             self.get_logger().info("Number of PSM after Global FDR filtering: {}".format(len(df_psms.index)))
         else:
             df_psms = self._compute_class_fdr(df_psms)
-            df_psms = df_psms[((df_psms['q-value'] < self._psm_pep_fdr_cutoff) & (
-                    df_psms['class-specific-q-value'] < self._psm_pep_class_fdr_cutoff))]
+            mask = (df_psms['q-value'].to_numpy() < float(self._psm_pep_fdr_cutoff)) & (
+                    df_psms['class-specific-q-value'].to_numpy() < float(self._psm_pep_class_fdr_cutoff))
+            df_psms = df_psms.iloc[mask]
             self.get_logger().info("Number of PSM after Class FDR filtering: {}".format(len(df_psms.index)))
 
         if self._file_type == 'idxml':
@@ -395,6 +414,8 @@ class OpenmsDataService(ParameterConfiguration):
         idxml_parser().load(input_file, prot_ids, pep_ids)
 
         new_pep_ids = []
+        index_set = set(df.index)
+        new_columns_values = {col: df[col] for col in new_columns}
 
         protein_dic = {}
         for pro in prot_ids:
@@ -404,6 +425,7 @@ class OpenmsDataService(ParameterConfiguration):
             ms_run = [n.decode() for n in ms_run]
             protein_dic[pro_run_id] = "_".join(ms_run)
 
+        get_psm_index = self._get_psm_index
         for peptide_id in pep_ids:
             hits = peptide_id.getHits()
             psmid = 1
@@ -419,10 +441,10 @@ class OpenmsDataService(ParameterConfiguration):
 
             new_hits = []
             for h in hits:
-                key = self._get_psm_index(ms_run_acc, specid, psmid)
-                if key in df.index:
+                key = get_psm_index(ms_run_acc, specid, psmid)
+                if key in index_set:
                     for col in new_columns:
-                        value = df.at[key, col]
+                        value = new_columns_values[col].at[key]
                         if value is not None:
                             h.setMetaValue(col, value)
                     new_hits.append(h)
@@ -439,27 +461,27 @@ class OpenmsDataService(ParameterConfiguration):
     @staticmethod
     def _str_to_int(df: DataFrame):
         """
-    Convert string in dataframe to Flot values
+    Convert the float columns of the dataframe that only contain integer values to int
     :param df: DataFrame
-    :return: Dataframe with all values in Flot
+    :return: Dataframe with the integer columns in int
     """
-        for col in df:
-            try:
-                if all([i.is_integer() for i in df[col]]):
-                    df[col] = [int(x) for x in df[col]]
-            except AttributeError:
-                continue
+        for col in df.select_dtypes(include=['float64', 'float32']).columns:
+            values = df[col].to_numpy()
+            if np.all(np.isfinite(values)) and np.all(np.mod(values, 1) == 0):
+                df[col] = values.astype(np.int64)
         return df
 
     @staticmethod
-    def _get_ptm_str(psm):
+    def _get_ptm_str(psm, sequence=None):
         """
     This function converts a Peptide Hit in idXML into a PTM modification format as requested by DeepLC
     see documentation of the PTMs (https://github.com/compomics/DeepLC#input-files)
     :param psm: Peptide Hit
+    :param sequence: AASequence of the Peptide Hit if it has been already retrieved
     :return: modification string position and name of the PTM
     """
-        sequence = psm.getSequence()
+        if sequence is None:
+            sequence = psm.getSequence()
         mod_str = ""
         if sequence.hasNTerminalModification():
             mod_str = mod_str + "0|" + sequence.getNTerminalModificationName()
@@ -498,11 +520,36 @@ class OpenmsDataService(ParameterConfiguration):
             ms_run = [n.decode() for n in ms_run]
             protein_dic[pro_run_id] = "_".join(ms_run)
 
+        hits_per_id = [peptide_id.getHits() for peptide_id in pep_ids]
+        n_hits = sum(len(hits) for hits in hits_per_id)
+
+        # numeric columns are filled in typed arrays, only the strings and accessions are kept as objects
+        targets = np.empty(n_hits, dtype=np.int8)
+        charges = np.empty(n_hits, dtype=np.int16)
+        mzs = np.empty(n_hits, dtype=np.float64)
+        rts = np.empty(n_hits, dtype=np.float64)
+        peptide_lengths = np.empty(n_hits, dtype=np.int16)
+        scores = np.empty(n_hits, dtype=np.float64)
+        orders = np.empty(n_hits, dtype=bool)
+        psm_indexes = []
+        scan_nrs = []
+        sequences = []
+        unmodified_sequences = []
+        mod_strs = []
+        accessions_list = []
         meta_value_keys = []
-        rows = []
-        all_columns = []
+        meta_values = {}
 
-        for peptide_id in pep_ids:
+        # meta values already stored as columns or excluded from the dataframe
+        exclude_columns = frozenset(self._openms_exclude_columns)
+        exclude_tokens = ("target_decoy", "spectrum_reference", "rank")
+
+        # bind the helpers once, they are called for every hit
+        get_psm_index = self._get_psm_index
+        get_ptm_str = self._get_ptm_str
+
+        i = 0
+        for peptide_id, hits in zip(pep_ids, hits_per_id):
             spectrum_id = peptide_id.getMetaValue(self._psm_spectrum_reference)
             scan_nr = spectrum_id[spectrum_id.rfind('=') + 1:]
             psm_index = 1
@@ -513,48 +560,52 @@ class OpenmsDataService(ParameterConfiguration):
                         pep_acc, spectrum_id))
 
             ms_run_acc = protein_dic[pep_acc]
-            hits = peptide_id.getHits()
             order = peptide_id.isHigherScoreBetter()
+            mz = peptide_id.getMZ()
+            rt = peptide_id.getRT()
 
             for h in hits:
-                charge = h.getCharge()
-                if "target" in h.getMetaValue("target_decoy"):
-                    label = 1
-                else:
-                    label = 0
-                sequence = h.getSequence().toString()
-                unmodified_sequence = h.getSequence().toUnmodifiedString()
-                accessions = [ev.getProteinAccession() for ev in h.getPeptideEvidences()]
-                score = h.getScore()
-                rt = peptide_id.getRT()
-
-                ptm_str = self._get_ptm_str(psm=h)
-
                 if len(meta_value_keys) == 0:
                     h.getKeys(meta_value_keys)
-                    meta_value_keys = [x.decode() for x in meta_value_keys if not (
-                            "target_decoy" in x.decode() or "spectrum_reference" in x.decode() or "rank" in x.decode() or x.decode() in self._openms_exclude_columns)]
-                    all_columns = [self._psm_df_index, "target", "scanNr", "charge", "mz", "rt", "peptide",
-                                   "unmodified_peptide", "mod_str",
-                                   "peptide_length", "accessions", "score", "is_higher_score_better"] + meta_value_keys
-
-                df_psm_index = self._get_psm_index(ms_run_acc, spectrum_id, psm_index)
-                row = [df_psm_index, label, scan_nr, charge, peptide_id.getMZ(), rt, sequence, unmodified_sequence,
-                       ptm_str,
-                       str(len(unmodified_sequence)), accessions, score, order]
-                # scores in meta values
+                    meta_value_keys = [k for k in (x.decode() for x in meta_value_keys) if not (
+                            k in exclude_columns or any(token in k for token in exclude_tokens))]
+                    # the hits before the first one with meta values have no value for them
+                    meta_values = {k: [None] * i for k in meta_value_keys}
+
+                # each getSequence call copies the AASequence from C++, get it once per hit
+                aa_sequence = h.getSequence()
+                unmodified_sequence = aa_sequence.toUnmodifiedString()
+                targets[i] = 1 if "target" in h.getMetaValue("target_decoy") else 0
+                charges[i] = h.getCharge()
+                mzs[i] = mz
+                rts[i] = rt
+                peptide_lengths[i] = len(unmodified_sequence)
+                scores[i] = h.getScore()
+                orders[i] = order
+                psm_indexes.append(get_psm_index(ms_run_acc, spectrum_id, psm_index))
+                scan_nrs.append(scan_nr)
+                sequences.append(aa_sequence.toString())
+                unmodified_sequences.append(unmodified_sequence)
+                mod_strs.append(get_ptm_str(psm=h, sequence=aa_sequence))
+                accessions_list.append([ev.getProteinAccession() for ev in h.getPeptideEvidences()])
+
+                # scores in meta values, the keys are filtered once with the first hit
                 for k in meta_value_keys:
-                    if not (
-                            "target_decoy" in k or "spectrum_reference" in k or "rank" in k or k in self._openms_exclude_columns):  # don't add them twice
-                        s = h.getMetaValue(k)
-                        if isinstance(s, bytes):
-                            s = s.decode()
-                        row.append(s)
-                rows.append(row)
+                    s = h.getMetaValue(k)
+                    if isinstance(s, bytes):
+                        s = s.decode()
+                    meta_values[k].append(s)
                 psm_index += 1
-        df = pd.DataFrame(rows, columns=all_columns)
+                i += 1
 
-        df = self._str_to_int(df)
+        df = pd.DataFrame({self._psm_df_index: psm_indexes, "target": targets, "is_decoy": targets == 0,
+                           "scanNr": scan_nrs, "charge": charges, "mz": mzs, "rt": rts, "peptide": sequences,
+                           "unmodified_peptide": unmodified_sequences, "mod_str": mod_strs,
+                           "peptide_length": peptide_lengths, "accessions": accessions_list, "score": scores,
+                           "is_higher_score_better": orders, **meta_values})
+
+        if len(meta_value_keys) > 0:
+            df[meta_value_keys] = self._str_to_int(df[meta_value_keys].copy())
         df.set_index(self._psm_df_index, inplace=True)
 
         return df
@@ -565,28 +616,20 @@ class OpenmsDataService(ParameterConfiguration):
     :param input_file:
     :return:
     """
-        all_columns = [self._psm_df_index, "run", "condition", "charge", "score", "intensity", "peptide", "accessions",
-                       "is_higher_score_better"]
-        rows = []
-        first_line = 0
-        with open(input_file, 'r') as source:
-            for line in source:
-                line = line.rstrip()
-                if first_line != 0:
-                    a = line.split('\t')
-                    a = ["_".join(a), *a, True]
-                    rows.append(a)
-                first_line += 1
-
-        df = pd.DataFrame(rows, columns=all_columns)
-
-        print(len(df.index))
-        # with concurrent.futures.ProcessPoolExecutor(num_processes) as pool:
-        #   df['target'] = pd.DataFrame(pool.map(df['accessions'].map(lambda x: is_peptide_decoy(x, decoy_prefix))))  # With a progressbar
-        # print(len(df.index))
-        df["target"] = df['accessions'].map(lambda x: not (self._decoy_prefix in x))
-
-        df = self._str_to_int(df)
+        columns = ["run", "condition", "charge", "score", "intensity", "peptide", "accessions"]
+        df = pd.read_csv(input_file, sep='\t', engine='c', header=0, names=columns, dtype=str, na_filter=False)
+
+        # the PSM key is the "_"-joined raw line, it is built before the numeric columns are parsed
+        df.insert(0, self._psm_df_index, ["_".join(row) for row in zip(*(df[col].tolist() for col in columns))])
+        df["charge"] = df["charge"].astype(np.int64)
+        df["score"] = df["score"].astype(np.float64)
+        df["intensity"] = df["intensity"].astype(np.float64)
+        df["is_higher_score_better"] = True
+        df["target"] = ~df['accessions'].str.contains(self._decoy_prefix, regex=False)
+        df["is_decoy"] = ~df["target"]
+        # the accessions are lists of one protein as in the idXML PSMs
+        df["accessions"] = df["accessions"].to_numpy()[:, None].tolist()
+
         df.set_index(self._psm_df_index, inplace=True)
         return df
 
@@ -599,6 +642,7 @@ class OpenmsDataService(ParameterConfiguration):
     :return:
     """
         result_df = df_psms[["run", "condition", "charge", "score", "intensity", "peptide", "accessions"]]
+        result_df = result_df.assign(accessions=result_df["accessions"].str.join('\t'))
         result_df.rename(columns={"score": "searchScore", "accessions": "proteins"}, errors="raise")
         result_df.to_csv(output_file, sep='\t', index=False, header=True)
 
@@ -615,7 +659,8 @@ class OpenmsDataService(ParameterConfiguration):
         else:
             peptide_class_prefix = peptide_class_prefix.split(",")
 
-        peptides = peptides[peptides['accessions'].apply(lambda x: not (any(self._decoy_prefix in s for s in x)))]
+        decoy_prefix = self._decoy_prefix
+        peptides = peptides[peptides['accessions'].apply(lambda x: not (any(decoy_prefix in s for s in x)))]
 
         if novel_peptides:
             peptides = peptides[peptides['accessions'].apply(lambda x: self._filter_by_group(x, peptide_class_prefix))]
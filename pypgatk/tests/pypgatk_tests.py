@@ -1,7 +1,10 @@
+import os
+import tempfile
 import unittest
 
 from click.testing import CliRunner
 
+from pypgatk.proteomics.openms import OpenmsDataService
 from pypgatk.pypgatk_cli import cli
 
 
@@ -28,6 +31,81 @@ class PypgatkRunnerTests(unittest.TestCase):
                                 '--peptide-classes-prefix', '"altorf,pseudo,ncRNA,COSMIC,cbiomut,var_mut,var_rs"'])
         self.assertEqual(result.exit_code, 0)
 
+    def test_peptide_classes_fdr_cutoffs(self):
+        runner = CliRunner()
+        result = runner.invoke(cli,
+                               ['peptide-class-fdr',
+                                '-in', 'testdata/20151020_QE3_UPLC8_DBJ_SA_HCT116_Rep2_46frac_10_consensus.idxml',
+                                '-out',
+                                'testdata/20151020_QE3_UPLC8_DBJ_SA_HCT116_Rep2_46frac_10_consensus_filter.idxml',
+                                '--peptide-classes-prefix', '"altorf,pseudo,ncRNA,COSMIC,cbiomut,var_mut,var_rs"',
+                                '--psm-pep-fdr-cutoff', '0.05', '--psm-pep-class-fdr-cutoff', '0.05'])
+        self.assertEqual(result.exit_code, 0)
+
+    def test_compute_bayesian_class_fdr(self):
+        """
+        Test the bayesian class-specific q-values of the PSMs of each peptide class in an idXML file
+        :return:
+        """
+        service = OpenmsDataService(None, {'peptide_groups_prefix': {'altorf': ['altorf'], 'pseudo': ['pseudo'],
+                                                                     'ncRNA': ['ncRNA']}})
+        df = service._psm_idxml_todf('testdata/20151020_QE3_UPLC8_DBJ_SA_HCT116_Rep2_46frac_10_consensus.idxml')
+        df = service._compute_global_fdr(df)
+        df = service._compute_bayesian_class_fdr(df)
+        self.assertEqual(len(df.index), 40438)
+
+        psm_prefix = '20151020_QE3_UPLC8_DBJ_SA_HCT116_Rep2_46frac_10.mzML_controllerType=0 controllerNumber=1 scan='
+        class_qvalues = df['class-specific-q-value']
+        self.assertAlmostEqual(class_qvalues[psm_prefix + '7742_1'], 0.106375300526, places=9)
+        self.assertAlmostEqual(class_qvalues[psm_prefix + '1537_1'], 0.106650987919, places=9)
+        self.assertAlmostEqual(class_qvalues[psm_prefix + '6_1'], 0.204093812291, places=9)
+        # canonical PSMs keep their global q-value
+        self.assertEqual(class_qvalues[psm_prefix + '18732_1'], df.at[psm_prefix + '18732_1', 'q-value'])
+        # a ncRNA decoy scored before any ncRNA target has no novel targets to estimate the FDR
+        self.assertEqual(class_qvalues[psm_prefix + '8335_1'], 10000)
+
+    def test_psms_triqler_todf(self):
+        """
+        Test the parsing of a Triqler file, the PSM keys keep the text of the numeric columns
+        :return:
+        """
+        df = OpenmsDataService(None, {})._psms_triqler_todf('testdata/test_triqler.tsv')
+        self.assertEqual(len(df.index), 4)
+        psm = df.loc['r1_c1_2_0.950_1000.0_PEPTIDEK_sp|P1']
+        self.assertEqual(psm['run'], 'r1')
+        self.assertEqual(psm['charge'], 2)
+        self.assertEqual(psm['peptide'], 'PEPTIDEK')
+        self.assertEqual(psm['score'], 0.95)
+        self.assertEqual(psm['accessions'], ['sp|P1'])
+        self.assertTrue(psm['target'])
+        self.assertFalse(df.loc['r1_c2_3_1.20_2000_PEPTIDER_DECOY_sp|P2', 'target'])
+
+    def test_triqler_class_masks(self):
+        """
+        Test that the Triqler accessions with a class prefix belong to their peptide class
+        :return:
+        """
+        service = OpenmsDataService(None, {})
+        df = service._psms_triqler_todf('testdata/test_triqler.tsv')
+        class_masks = service._get_peptide_class_masks(df['accessions'].to_numpy())
+        # the altorf accession is in the non_canonical class of the default peptide groups
+        self.assertEqual(class_masks.tolist(), [[False, False, False], [False, False, False],
+                                                [False, False, False], [True, False, False]])
+
+    def test_export_df_triqler(self):
+        """
+        Test that the PSMs exported to a Triqler file are parsed back with the same proteins
+        :return:
+        """
+        service = OpenmsDataService(None, {})
+        df = service._psms_triqler_todf('testdata/test_triqler.tsv')
+        with tempfile.TemporaryDirectory() as output_dir:
+            output_file = os.path.join(output_dir, 'test_triqler_export.tsv')
+            service._export_df_triqler(df, output_file)
+            exported_df = service._psms_triqler_todf(output_file)
+        self.assertEqual(exported_df['peptide'].tolist(), df['peptide'].tolist())
+        self.assertEqual(exported_df['accessions'].tolist(), df['accessions'].tolist())
+
     def test_vcf_to_proteindb(self):
         """
         Test the default behaviour of the vcf-to-proteindb tool